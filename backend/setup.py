@@ -0,0 +1,30 @@
+"""Build the optional compiled speedups; metadata lives in pyproject.toml.
+
+Cython is not a build requirement, so regular (isolated) installs ship the
+pure-Python formatters. To opt in to the extension, install Cython and a C
+compiler into the environment and build without isolation:
+
+    pip install Cython && pip install --no-build-isolation -e .
+"""
+
+from setuptools import Extension, setup
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    # No Cython: ship the pure-Python formatters only
+    ext_modules = []
+else:
+    ext_modules = cythonize(
+        [
+            Extension(
+                "agent._youtube_speedups",
+                ["src/agent/_youtube_speedups.pyx"],
+                # A missing C toolchain must not break the install
+                optional=True,
+            )
+        ],
+        language_level=3,
+    )
+
+setup(ext_modules=ext_modules)
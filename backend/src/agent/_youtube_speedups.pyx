@@ -0,0 +1,56 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Compiled versions of the YouTube result formatters.
+
+Optional: youtube_tool.py falls back to its pure-Python implementations
+when this extension was not built.
+"""
+
+
+cpdef str format_duration(str duration_str):
+    """Convert ISO 8601 duration to readable format (e.g., PT4M13S -> 4:13)"""
+    cdef Py_ssize_t i, n = len(duration_str)
+    cdef Py_UCS4 ch
+    cdef long long hours = 0, minutes = 0, seconds = 0, value = 0
+    # Past this the C accumulator could overflow; Python ints cannot
+    cdef long long max_value = 100000000000000000
+
+    if n < 2 or duration_str[0] != u"P" or duration_str[1] != u"T":
+        return "Unknown"
+
+    for i in range(2, n):
+        ch = duration_str[i]
+        if u"0" <= ch <= u"9":
+            if value >= max_value:
+                return None
+            value = value * 10 + (<long long>ch - 48)
+        elif ch == u"H":
+            hours, value = value, 0
+        elif ch == u"M":
+            minutes, value = value, 0
+        elif ch == u"S":
+            seconds, value = value, 0
+        else:
+            # Let the caller's lenient parser handle it
+            return None
+
+    if hours > 0:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    else:
+        return f"{minutes}:{seconds:02d}"
+
+
+cpdef str format_view_count(object count):
+    """Format view count in a readable way (e.g., 1234567 -> 1.2M views)"""
+    # count stays a Python int so arbitrarily large values format exactly
+    # like the pure-Python version instead of overflowing
+    cdef str suffix
+    if count < 1000:
+        return f"{count} views"
+    elif count < 1000000:
+        unit, suffix = 100, "K"
+    elif count < 1000000000:
+        unit, suffix = 100000, "M"
+    else:
+        unit, suffix = 100000000, "B"
+    tenths = (count + unit // 2) // unit
+    return f"{tenths // 10}.{tenths % 10}{suffix} views"
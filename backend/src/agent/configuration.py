@@ -34,6 +34,20 @@ class Configuration(BaseModel):
         metadata={"description": "The number of initial search queries to generate."},
     )
 
+    max_research_result_chars: int = Field(
+        default=4000,
+        metadata={
+            "description": "The maximum number of characters kept from each web research result."
+        },
+    )
+
+    youtube_include_details: bool = Field(
+        default=True,
+        metadata={
+            "description": "Whether to fetch duration and view count for YouTube results (one extra API call)."
+        },
+    )
+
     max_research_loops: int = Field(
         default=2,
         metadata={"description": "The maximum number of research loops to perform."},
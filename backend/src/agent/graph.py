@@ -1,6 +1,16 @@
+import asyncio
+import functools
+import hashlib
 import os
+import re
+import time
+import msgspec
+from cachetools import LRUCache, TTLCache
 from dotenv import load_dotenv
+from langchain_core.caches import InMemoryCache
+from langchain_core.globals import set_llm_cache
 from langchain_core.messages import AIMessage
+from langgraph.config import get_stream_writer
 from langgraph.types import Send
 from langgraph.graph import StateGraph
 from langgraph.graph import START, END
@@ -10,7 +20,7 @@ from langchain_google_genai import ChatGoogleGenerativeAI
 from typing import Annotated
 from typing_extensions import TypedDict
 from operator import add
-from typing import Annotated, List
+from typing import Annotated, List, Optional
 from typing_extensions import TypedDict
 from operator import add
 from langgraph.graph import StateGraph
@@ -26,6 +36,7 @@ class QueryGenerationState(TypedDict):
 # from agent.youtube_tool import YouTubeTool, YouTubeSearchResults
 
 from agent.state import (
+    BatchWebSearchState,
     OverallState,
     QueryGenerationState,
     ReflectionState,
@@ -35,52 +46,186 @@ from agent.state import (
 from agent.configuration import Configuration
 from agent.prompts import (
     get_current_date,
-    query_writer_instructions,
-    web_searcher_instructions,
-    reflection_instructions,
-    answer_instructions,
-    intent_classification_instructions,
+    render_query_writer_instructions,
+    render_web_searcher_instructions,
+    render_reflection_instructions,
+    render_answer_instructions,
+    render_intent_classification_instructions,
 )
 from agent.utils import (
+    ShortUrlStreamRewriter,
+    build_short_url_automaton,
     get_citations,
+    get_latest_user_message,
     get_research_topic,
     insert_citation_markers,
     resolve_urls,
+    truncate_research_text,
 )
 
 load_dotenv()
 
-if os.getenv("GEMINI_API_KEY") is None:
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
+
+if GEMINI_API_KEY is None:
     raise ValueError("GEMINI_API_KEY is not set")
 
 # Initialize clients
-genai_client = Client(api_key=os.getenv("GEMINI_API_KEY"))
-# Move YouTube tool initialization inside the function that uses it
-# youtube_tool = YouTubeTool() if os.getenv("YOUTUBE_API_KEY") else None
+genai_client = Client(api_key=GEMINI_API_KEY)
+
+# Cache LLM responses so repeated prompts skip the Gemini round-trip. With a
+# Redis Stack instance configured, near-duplicate prompts are matched by
+# embedding similarity; otherwise fall back to an in-process exact-match cache.
+if os.getenv("SEMANTIC_CACHE_REDIS_URL"):
+    from langchain_community.cache import RedisSemanticCache
+    from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+    set_llm_cache(
+        RedisSemanticCache(
+            redis_url=os.getenv("SEMANTIC_CACHE_REDIS_URL"),
+            embedding=GoogleGenerativeAIEmbeddings(
+                model="models/text-embedding-004",
+                google_api_key=GEMINI_API_KEY,
+            ),
+            score_threshold=0.05,
+        )
+    )
+else:
+    set_llm_cache(InMemoryCache(maxsize=1024))
 
+# Intent classification runs at temperature 0, so the result for a given topic is stable
+_intent_cache: LRUCache = LRUCache(maxsize=1024)
+# Search results age, so grounded responses are only reused for a limited time
+WEB_RESEARCH_CACHE_TTL = int(os.getenv("WEB_RESEARCH_CACHE_TTL", "900"))
+_web_research_cache: TTLCache = TTLCache(maxsize=256, ttl=WEB_RESEARCH_CACHE_TTL)
 
-# NEW NODE: Intent Classification
-def classify_intent(state: OverallState, config: RunnableConfig) -> OverallState:
-    """Classify whether the user query is for research or YouTube action"""
-    # Import locally to avoid circular imports
-    from agent.tools_and_schemas import IntentClassification
-    
-    configurable = Configuration.from_runnable_config(config)
-    
-    llm = ChatGoogleGenerativeAI(
-        model=configurable.query_generator_model,
-        temperature=0,
+# Prefix of the placeholder summary web_research stores when a search fails
+WEB_RESEARCH_ERROR_PREFIX = "Error performing web research"
+
+# Streamed answer text is flushed to the custom stream at most this often
+ANSWER_STREAM_FLUSH_INTERVAL = 0.05
+
+
+# Keyword gates that resolve unambiguous intents without an LLM round-trip.
+# Only YouTube-specific wording short-circuits to a video search; "video",
+# "watch" or "channel" alone are left to the LLM ("how do video codecs work",
+# "history of the English Channel").
+_YT_RE = re.compile(r"\byoutube\b|youtu\.?be|\bshow me (?:some )?videos?\b", re.I)
+_RESEARCH_RE = re.compile(
+    r"\b(explain|research|compare|what is|how (?:do|does)|cite)\b", re.I
+)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_llm(model: str, temperature: float) -> ChatGoogleGenerativeAI:
+    """Return a shared chat model so its HTTP connection pool is reused across calls."""
+    return ChatGoogleGenerativeAI(
+        model=model,
+        temperature=temperature,
         max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
+        api_key=GEMINI_API_KEY,
     )
-    
-    structured_llm = llm.with_structured_output(IntentClassification)
-    
-    formatted_prompt = intent_classification_instructions.format(
-        user_query=get_research_topic(state["messages"])
+
+
+@functools.lru_cache(maxsize=8)
+def _get_structured_llm(model: str, temperature: float, schema: type):
+    """Return a shared chat model bound to the structured output ``schema``."""
+    return _get_llm(model, temperature).with_structured_output(schema)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_json_llm(model: str, temperature: float) -> ChatGoogleGenerativeAI:
+    """Return a shared chat model that answers with raw JSON."""
+    return ChatGoogleGenerativeAI(
+        model=model,
+        temperature=temperature,
+        max_retries=2,
+        api_key=GEMINI_API_KEY,
+        response_mime_type="application/json",
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _get_json_decoder(struct: type) -> msgspec.json.Decoder:
+    return msgspec.json.Decoder(struct)
+
+
+async def _ainvoke_structured(
+    model: str, temperature: float, struct: type, schema: type, prompt: str
+):
+    """Invoke the model in JSON mode and decode its reply into ``struct``.
+
+    Falls back to tool-calling structured output with the Pydantic ``schema``
+    when the reply does not decode.
+    """
+    message = await _get_json_llm(model, temperature).ainvoke(prompt)
+    try:
+        return _get_json_decoder(struct).decode(message.content)
+    except (msgspec.DecodeError, TypeError):
+        return await _get_structured_llm(model, temperature, schema).ainvoke(prompt)
+
+
+def _get_youtube_tool():
+    """Return the shared YouTube tool, or None when it is not configured."""
+    # Import locally to avoid circular imports
+    from agent.youtube_tool import get_youtube_tool
+
+    return get_youtube_tool() if YOUTUBE_API_KEY else None
+
+
+def _keyword_intent(messages: list) -> Optional[dict]:
+    """Classify the latest user message from keywords alone, or return None when they are ambiguous."""
+    # Earlier turns (including our own "I found 5 videos ..." replies) must
+    # not decide the intent of the current question
+    user_query = get_latest_user_message(messages)
+    is_youtube = _YT_RE.search(user_query) is not None
+    is_research = _RESEARCH_RE.search(user_query) is not None
+    if is_youtube == is_research:
+        return None
+    if is_youtube and len(messages) > 1:
+        # The search terms may refer back to the history ("show me videos
+        # of that"); let the LLM extract the youtube_query
+        return None
+    return {
+        "intent_type": "youtube" if is_youtube else "research",
+        "confidence": 0.95,
+        "youtube_query": user_query if is_youtube else None,
+    }
+
+
+async def classify_intent(state: OverallState, config: RunnableConfig) -> OverallState:
+    """Classify whether the user query is for research or YouTube action"""
+    # Import locally to avoid circular imports
+    from agent.tools_and_schemas import (
+        IntentClassification,
+        IntentClassificationStruct,
     )
     
-    result = structured_llm.invoke(formatted_prompt)
+    configurable = Configuration.from_runnable_config(config)
+    user_query = state.get("research_topic") or get_research_topic(state["messages"])
+
+    # Only defer to the LLM when the keyword gates are ambiguous
+    keyword_intent = _keyword_intent(state["messages"])
+    if keyword_intent is not None:
+        return keyword_intent
+
+    cache_key = (configurable.query_generator_model, user_query)
+
+    result = _intent_cache.get(cache_key)
+    if result is None:
+        formatted_prompt = render_intent_classification_instructions(
+            user_query=user_query
+        )
+
+        result = await _ainvoke_structured(
+            configurable.query_generator_model,
+            0,
+            IntentClassificationStruct,
+            IntentClassification,
+            formatted_prompt,
+        )
+        _intent_cache[cache_key] = result
     
     return {
         "intent_type": result.intent_type,
@@ -89,13 +234,44 @@ def classify_intent(state: OverallState, config: RunnableConfig) -> OverallState
     }
 
 
+# NEW NODE: Intent Classification with speculative query generation
+async def classify_and_prefetch(state: OverallState, config: RunnableConfig) -> OverallState:
+    """LangGraph node that classifies the intent while speculatively generating search queries.
+
+    Research is the common case, so query generation starts alongside the
+    intent classification and is only cancelled if the query turns out to be
+    a pure YouTube request.
+    """
+    # Computed once per request and reused by the downstream nodes
+    request_context = {
+        "current_date": get_current_date(),
+        "research_topic": get_research_topic(state["messages"]),
+    }
+    request_state = {**state, **request_context}
+
+    intent = _keyword_intent(state["messages"])
+    if intent is not None and intent["intent_type"] == "youtube":
+        return {**request_context, **intent}
+
+    prefetch_task = asyncio.create_task(generate_query(request_state, config))
+    if intent is None:
+        try:
+            intent = await classify_intent(request_state, config)
+        except BaseException:
+            prefetch_task.cancel()
+            raise
+        if intent["intent_type"] == "youtube":
+            prefetch_task.cancel()
+            return {**request_context, **intent}
+
+    return {**request_context, **intent, **(await prefetch_task)}
+
+
 # NEW NODE: YouTube Action
-def youtube_action(state: YouTubeActionState, config: RunnableConfig) -> OverallState:
+async def youtube_action(state: YouTubeActionState, config: RunnableConfig) -> OverallState:
     """Execute YouTube search and return results"""
-    # Import locally to avoid circular imports
-    from agent.youtube_tool import YouTubeTool
-    
-    youtube_tool = YouTubeTool() if os.getenv("YOUTUBE_API_KEY") else None
+    configurable = Configuration.from_runnable_config(config)
+    youtube_tool = _get_youtube_tool()
     
     if not youtube_tool:
         return {
@@ -105,24 +281,38 @@ def youtube_action(state: YouTubeActionState, config: RunnableConfig) -> Overall
     
     try:
         # Use the extracted YouTube query or fall back to original message
-        query = state.get("youtube_query") or get_research_topic(state["messages"])
+        query = state.get("youtube_query") or state.get("research_topic") or get_research_topic(state["messages"])
         
         # Search YouTube
-        results = youtube_tool.search_videos(query, max_results=5)
+        results = await youtube_tool.search_videos_async(
+            query,
+            max_results=5,
+            include_details=configurable.youtube_include_details,
+        )
         
         if not results.videos:
             response_text = f"Sorry, I couldn't find any YouTube videos for '{query}'. Try a different search term."
         else:
             # Format response text
-            response_text = f"I found {len(results.videos)} videos for '{query}':\n\n"
-            for i, video in enumerate(results.videos, 1):
-                response_text += f"{i}. **{video.title}** by {video.channel}\n"
-                response_text += f"   Duration: {video.duration} | Views: {video.view_count}\n"
-                response_text += f"   Published: {video.published_at}\n\n"
+            lines = [f"I found {len(results.videos)} videos for '{query}':", ""]
+            if configurable.youtube_include_details:
+                lines.extend(
+                    f"{i}. **{video.title}** by {video.channel}\n"
+                    f"   Duration: {video.duration} | Views: {video.view_count}\n"
+                    f"   Published: {video.published_at}\n"
+                    for i, video in enumerate(results.videos, 1)
+                )
+            else:
+                lines.extend(
+                    f"{i}. **{video.title}** by {video.channel}\n"
+                    f"   Published: {video.published_at}\n"
+                    for i, video in enumerate(results.videos, 1)
+                )
+            response_text = "\n".join(lines) + "\n"
         
         return {
             "messages": [AIMessage(content=response_text)],
-            "youtube_results": results.dict() if results.videos else None,
+            "youtube_results": results.model_dump(mode="json") if results.videos else None,
         }
         
     except Exception as e:
@@ -133,48 +323,46 @@ def youtube_action(state: YouTubeActionState, config: RunnableConfig) -> Overall
 
 
 # ROUTING FUNCTION
-def route_after_intent(state: OverallState) -> str:
-    """Route to either research or YouTube action based on intent classification"""
-    intent_type = state.get("intent_type", "research")
-    
-    if intent_type == "youtube":
-        return "youtube_action"
-    else:
-        return "generate_query"
+def _route_to_youtube(state: OverallState) -> str:
+    return "youtube_action"
+
 
+def route_after_intent(state: OverallState):
+    """Route to either the prefetched web research or YouTube action based on intent classification"""
+    route = _INTENT_ROUTES.get(state.get("intent_type"), continue_to_web_research)
+    return route(state)
 
-# FIXED: Generate Query Node
-def generate_query(state: OverallState, config: RunnableConfig) -> OverallState:
-    """LangGraph node that generates search queries based on the User's question."""
-    from agent.tools_and_schemas import SearchQueryList
+
+# FIXED: Generate Query
+async def generate_query(state: OverallState, config: RunnableConfig) -> OverallState:
+    """Generate search queries based on the User's question."""
+    from agent.tools_and_schemas import SearchQueryList, SearchQueryListStruct
 
     configurable = Configuration.from_runnable_config(config)
 
     if state.get("initial_search_query_count") is None:
         state["initial_search_query_count"] = configurable.number_of_initial_queries
 
-    llm = ChatGoogleGenerativeAI(
-        model=configurable.query_generator_model,
-        temperature=1.0,
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
-    structured_llm = llm.with_structured_output(SearchQueryList)
-
-    current_date = get_current_date()
-    research_topic = get_research_topic(state["messages"])
+    current_date = state.get("current_date") or get_current_date()
+    research_topic = state.get("research_topic") or get_research_topic(state["messages"])
 
     youtube_context = ""
     if state.get("youtube_results"):
         youtube_context = "\n\nNote: The user also requested YouTube videos, which have been provided separately."
 
-    formatted_prompt = query_writer_instructions.format(
+    formatted_prompt = render_query_writer_instructions(
         current_date=current_date,
         research_topic=research_topic + youtube_context,
         number_queries=state["initial_search_query_count"],
     )
 
-    result = structured_llm.invoke(formatted_prompt)
+    result = await _ainvoke_structured(
+        configurable.query_generator_model,
+        1.0,
+        SearchQueryListStruct,
+        SearchQueryList,
+        formatted_prompt,
+    )
 
     # Fixed: Return the queries directly as a list for the Annotated field
     return {"query_list": result.query}
@@ -187,12 +375,42 @@ def continue_to_web_research(state: OverallState):
         queries = [queries] if queries else []
 
     return [
-        Send("web_research", {"search_query": query, "id": int(idx)})
+        Send(
+            "web_research",
+            {
+                "search_query": query,
+                "id": int(idx),
+                "current_date": state.get("current_date"),
+            },
+        )
         for idx, query in enumerate(queries)
     ]
 
 
-def web_research(state: WebSearchState, config: RunnableConfig) -> OverallState:
+# Keyed by the IntentClassification.intent_type literals
+_INTENT_ROUTES = {
+    "youtube": _route_to_youtube,
+    "research": continue_to_web_research,
+    "mixed": continue_to_web_research,
+}
+
+
+def _cite_response(response, query_id: int, max_chars: int) -> tuple[list, str]:
+    """Resolve the grounding urls of a search response and insert citation markers."""
+    grounding = getattr(response.candidates[0], "grounding_metadata", None)
+    if not grounding:
+        return [], truncate_research_text(response.text, max_chars)
+
+    resolved_urls = resolve_urls(grounding.grounding_chunks, query_id)
+    citations = get_citations(response, resolved_urls)
+    modified_text = insert_citation_markers(response.text, citations)
+    sources_gathered = [item for citation in citations for item in citation["segments"]]
+    # Keep the reflection and answer prompts short; they are re-sent every loop
+    return sources_gathered, truncate_research_text(modified_text, max_chars)
+
+
+async def web_research(state: WebSearchState, config: RunnableConfig) -> OverallState:
+    """LangGraph node that runs one grounded search; fanned-out queries run concurrently."""
     try:
         configurable = Configuration.from_runnable_config(config)
 
@@ -207,37 +425,43 @@ def web_research(state: WebSearchState, config: RunnableConfig) -> OverallState:
         else:
             search_query = str(search_query)
 
-        formatted_prompt = web_searcher_instructions.format(
-            current_date=get_current_date(),
-            research_topic=search_query,
-        )
-
-        response = genai_client.models.generate_content(
-            model=configurable.query_generator_model,
-            contents=formatted_prompt,
-            config={
-                "tools": [{"google_search": {}}],
-                "temperature": 0,
-            },
-        )
+        # Cache the raw response rather than the node output: the short urls
+        # depend on the per-run query id and are rebuilt below.
+        cache_key = (configurable.query_generator_model, search_query)
+        response = _web_research_cache.get(cache_key)
+        is_cached = response is not None
+        if not is_cached:
+            formatted_prompt = render_web_searcher_instructions(
+                current_date=state.get("current_date") or get_current_date(),
+                research_topic=search_query,
+            )
 
-        grounding = getattr(response.candidates[0], "grounding_metadata", None)
-        if not grounding:
-            return {
-                "sources_gathered": [],
-                "search_query": [search_query],  # Use search_query instead of query_list
-                "web_research_result": [response.text],
-            }
+            response = await genai_client.aio.models.generate_content(
+                model=configurable.query_generator_model,
+                contents=formatted_prompt,
+                config={
+                    "tools": [{"google_search": {}}],
+                    "temperature": 0,
+                },
+            )
 
-        resolved_urls = resolve_urls(grounding.grounding_chunks, state.get("id", 0))
-        citations = get_citations(response, resolved_urls)
-        modified_text = insert_citation_markers(response.text, citations)
-        sources_gathered = [item for citation in citations for item in citation["segments"]]
+        # Citation post-processing is CPU work; run it off the event loop so it
+        # overlaps with the network calls of the other concurrent searches
+        sources_gathered, research_text = await asyncio.to_thread(
+            _cite_response,
+            response,
+            state.get("id", 0),
+            configurable.max_research_result_chars,
+        )
+        # Only cache responses that processed cleanly; a blocked or empty
+        # response raises above and is retried on the next request
+        if not is_cached:
+            _web_research_cache[cache_key] = response
 
         return {
             "sources_gathered": sources_gathered,
             "search_query": [search_query],  # Use search_query instead of query_list
-            "web_research_result": [modified_text],
+            "web_research_result": [research_text],
         }
 
     except Exception as e:
@@ -245,42 +469,87 @@ def web_research(state: WebSearchState, config: RunnableConfig) -> OverallState:
         return {
             "sources_gathered": [],
             "search_query": [state.get("search_query", "unknown")],
-            "web_research_result": [f"Error performing web research: {str(e)}"],
+            "web_research_result": [f"{WEB_RESEARCH_ERROR_PREFIX}: {str(e)}"],
         }
 
 
-def reflection(state: OverallState, config: RunnableConfig) -> ReflectionState:
+async def batch_web_research(
+    state: BatchWebSearchState, config: RunnableConfig
+) -> OverallState:
+    """LangGraph node that runs a batch of searches concurrently and merges their results."""
+    results = await asyncio.gather(
+        *(
+            web_research(
+                {
+                    "search_query": search_query,
+                    "id": state["start_id"] + idx,
+                    "current_date": state.get("current_date"),
+                },
+                config,
+            )
+            for idx, search_query in enumerate(state["search_queries"])
+        )
+    )
+    return {
+        key: [item for result in results for item in result[key]]
+        for key in ("sources_gathered", "search_query", "web_research_result")
+    }
+
+
+def _join_summaries(results: list) -> str:
+    """Join the web research summaries for a prompt."""
+    return "\n\n---\n\n".join(results)
+
+
+async def reflection(state: OverallState, config: RunnableConfig) -> ReflectionState:
     """LangGraph node that identifies knowledge gaps and generates potential follow-up queries."""
     # Import locally to avoid circular imports
-    from agent.tools_and_schemas import Reflection
+    from agent.tools_and_schemas import Reflection, ReflectionStruct
     
     configurable = Configuration.from_runnable_config(config)
     # Increment the research loop count and get the reasoning model
     state["research_loop_count"] = state.get("research_loop_count", 0) + 1
     reasoning_model = state.get("reasoning_model") or configurable.reflection_model
 
+    results = state["web_research_result"]
+    summaries = _join_summaries(results)
+    summaries_digest = hashlib.blake2b(
+        "\0".join(sorted(set(results))).encode(), digest_size=16
+    ).hexdigest()
+    loop_state = {
+        "research_loop_count": state["research_loop_count"],
+        "number_of_ran_queries": len(state["search_query"]),
+        "summaries_digest": summaries_digest,
+    }
+
+    # Skip the reasoning model when there is nothing new to reflect on: every
+    # search failed, or the last loop only returned summaries we already had.
+    nothing_found = all(
+        not result or result.startswith(WEB_RESEARCH_ERROR_PREFIX) for result in results
+    )
+    if nothing_found or summaries_digest == state.get("summaries_digest"):
+        return {
+            "is_sufficient": True,
+            "knowledge_gap": "",
+            "follow_up_queries": [],
+            **loop_state,
+        }
+
     # Format the prompt
-    current_date = get_current_date()
-    formatted_prompt = reflection_instructions.format(
-        current_date=current_date,
-        research_topic=get_research_topic(state["messages"]),
-        summaries="\n\n---\n\n".join(state["web_research_result"]),
+    formatted_prompt = render_reflection_instructions(
+        research_topic=state.get("research_topic") or get_research_topic(state["messages"]),
+        summaries=summaries,
     )
     # init Reasoning Model
-    llm = ChatGoogleGenerativeAI(
-        model=reasoning_model,
-        temperature=1.0,
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
+    result = await _ainvoke_structured(
+        reasoning_model, 1.0, ReflectionStruct, Reflection, formatted_prompt
     )
-    result = llm.with_structured_output(Reflection).invoke(formatted_prompt)
 
     return {
         "is_sufficient": result.is_sufficient,
         "knowledge_gap": result.knowledge_gap,
         "follow_up_queries": result.follow_up_queries,
-        "research_loop_count": state["research_loop_count"],
-        "number_of_ran_queries": len(state["search_query"]),
+        **loop_state,
     }
 
 
@@ -298,51 +567,78 @@ def evaluate_research(
     if state["is_sufficient"] or state["research_loop_count"] >= max_research_loops:
         return "finalize_answer"
     else:
+        # Run all follow-up queries as one batched step
         return [
             Send(
-                "web_research",
+                "batch_web_research",
                 {
-                    "search_query": follow_up_query,
-                    "id": state["number_of_ran_queries"] + int(idx),
+                    "search_queries": state["follow_up_queries"],
+                    "start_id": state["number_of_ran_queries"],
+                    "current_date": state.get("current_date"),
                 },
             )
-            for idx, follow_up_query in enumerate(state["follow_up_queries"])
         ]
 
 
-def finalize_answer(state: OverallState, config: RunnableConfig):
+async def finalize_answer(state: OverallState, config: RunnableConfig):
     """LangGraph node that finalizes the research summary."""
     configurable = Configuration.from_runnable_config(config)
     reasoning_model = state.get("reasoning_model") or configurable.answer_model
 
     # Format the prompt
-    current_date = get_current_date()
-    formatted_prompt = answer_instructions.format(
-        current_date=current_date,
-        research_topic=get_research_topic(state["messages"]),
-        summaries="\n---\n\n".join(state["web_research_result"]),
+    formatted_prompt = render_answer_instructions(
+        current_date=state.get("current_date") or get_current_date(),
+        research_topic=state.get("research_topic") or get_research_topic(state["messages"]),
+        summaries=_join_summaries(state["web_research_result"]),
     )
 
     # init Reasoning Model, default to Gemini 2.5 Pro
-    llm = ChatGoogleGenerativeAI(
-        model=reasoning_model,
-        temperature=0,
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
-    result = llm.invoke(formatted_prompt)
-
-    # Replace the short urls with the original urls and add all used urls to the sources_gathered
-    unique_sources = []
+    llm = _get_llm(reasoning_model, 0)
+    writer = get_stream_writer()
+
+    # Stream the answer, replacing short urls with the original urls as soon as
+    # they are complete (see ShortUrlStreamRewriter). The batched chunks go to the
+    # "custom" stream, which the frontend renders while the answer is written.
+    # Note: astream does not consult the LLM cache configured above, so the
+    # answer call is never served from (or written to) it.
+    # The same short url is gathered once per citing segment; keep the first
+    sources_by_short_url = {}
     for source in state["sources_gathered"]:
-        if source["short_url"] in result.content:
-            result.content = result.content.replace(
-                source["short_url"], source["value"]
-            )
-            unique_sources.append(source)
+        sources_by_short_url.setdefault(source["short_url"], source)
+    rewriter = ShortUrlStreamRewriter(
+        build_short_url_automaton(sources_by_short_url.values())
+    )
+    answer_parts = []
+    unflushed = []
+    last_flush = time.monotonic()
+    async for chunk in llm.astream(formatted_prompt):
+        text = rewriter.feed(chunk.content)
+        if not text:
+            continue
+        answer_parts.append(text)
+        unflushed.append(text)
+
+        if time.monotonic() - last_flush >= ANSWER_STREAM_FLUSH_INTERVAL:
+            writer({"answer_chunk": "".join(unflushed)})
+            unflushed.clear()
+            last_flush = time.monotonic()
+
+    text = rewriter.flush()
+    if text:
+        answer_parts.append(text)
+        unflushed.append(text)
+    if unflushed:
+        writer({"answer_chunk": "".join(unflushed)})
+
+    # Add all used urls to the sources_gathered
+    unique_sources = [
+        source
+        for short_url, source in sources_by_short_url.items()
+        if short_url in rewriter.used_short_urls
+    ]
 
     return {
-        "messages": [AIMessage(content=result.content)],
+        "messages": [AIMessage(content="".join(answer_parts))],
         "sources_gathered": unique_sources,
     }
 
@@ -350,33 +646,31 @@ def finalize_answer(state: OverallState, config: RunnableConfig):
 builder = StateGraph(OverallState)
 
 # Add all nodes
-builder.add_node("classify_intent", classify_intent)
-builder.add_node("generate_query", generate_query)
+builder.add_node("classify_and_prefetch", classify_and_prefetch)
 builder.add_node("youtube_action", youtube_action)
 builder.add_node("web_research", web_research)
+builder.add_node("batch_web_research", batch_web_research)
 builder.add_node("reflection", reflection)
 builder.add_node("finalize_answer", finalize_answer)
 
 # Set the entrypoint as intent classification
-builder.add_edge(START, "classify_intent")
+builder.add_edge(START, "classify_and_prefetch")
 
-# Route based on intent
+# Route based on intent; research fans out straight to the prefetched queries
 builder.add_conditional_edges(
-    "classify_intent", 
-    route_after_intent, 
-    ["generate_query", "youtube_action"]
+    "classify_and_prefetch",
+    route_after_intent,
+    ["web_research", "youtube_action"]
 )
 
 # YouTube action goes directly to END (for pure YouTube queries)
 builder.add_edge("youtube_action", END)
 
 # Rest of the research flow remains the same
-builder.add_conditional_edges(
-    "generate_query", continue_to_web_research, ["web_research"]
-)
 builder.add_edge("web_research", "reflection")
+builder.add_edge("batch_web_research", "reflection")
 builder.add_conditional_edges(
-    "reflection", evaluate_research, ["web_research", "finalize_answer"]
+    "reflection", evaluate_research, ["batch_web_research", "finalize_answer"]
 )
 builder.add_edge("finalize_answer", END)
 
@@ -1,4 +1,6 @@
 from datetime import datetime
+from string import Formatter
+from typing import Callable
 
 
 # Get current date in a readable format
@@ -123,4 +125,30 @@ User Context:
 - {research_topic}
 
 Summaries:
-{summaries}"""
\ No newline at end of file
+{summaries}"""
+
+
+def compile_prompt(template: str) -> Callable[..., str]:
+    """Pre-parse a ``str.format`` template into a renderer that only joins its pieces."""
+    pieces = [
+        (literal, field_name)
+        for literal, field_name, _, _ in Formatter().parse(template)
+    ]
+
+    def render(**fields) -> str:
+        return "".join(
+            literal if field_name is None else literal + str(fields[field_name])
+            for literal, field_name in pieces
+        )
+
+    return render
+
+
+# Templates are parsed once at import instead of on every node invocation
+render_intent_classification_instructions = compile_prompt(
+    intent_classification_instructions
+)
+render_query_writer_instructions = compile_prompt(query_writer_instructions)
+render_web_searcher_instructions = compile_prompt(web_searcher_instructions)
+render_reflection_instructions = compile_prompt(reflection_instructions)
+render_answer_instructions = compile_prompt(answer_instructions)
@@ -20,6 +20,11 @@ class OverallState(TypedDict):
     max_research_loops: int
     research_loop_count: int
     reasoning_model: str
+    # Derived once per request by classify_intent and reused by later nodes
+    current_date: str
+    research_topic: str
+    # Digest of the distinct summaries seen by the last reflection
+    summaries_digest: str
     
     # Fixed: Use Annotated with operator.add for query_list to handle multiple values
     query_list: Annotated[list, operator.add]
@@ -37,6 +42,7 @@ class ReflectionState(TypedDict):
     follow_up_queries: Annotated[list, operator.add]
     research_loop_count: int
     number_of_ran_queries: int
+    current_date: str
 
 
 class Query(TypedDict):
@@ -52,6 +58,13 @@ class QueryGenerationState(TypedDict):
 class WebSearchState(TypedDict):
     search_query: str
     id: str
+    current_date: Optional[str]
+
+
+class BatchWebSearchState(TypedDict):
+    search_queries: list
+    start_id: int
+    current_date: Optional[str]
 
 
 class YouTubeActionState(TypedDict):
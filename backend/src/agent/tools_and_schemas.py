@@ -1,4 +1,6 @@
 from typing import List, Optional, Literal
+
+import msgspec
 from pydantic import BaseModel, Field
 
 
@@ -37,4 +39,25 @@ class IntentClassification(BaseModel):
     research_topic: Optional[str] = Field(
         description="Extracted research topic if intent_type is 'research' or 'mixed'",
         default=None
-    )
\ No newline at end of file
+    )
+
+
+# msgspec mirrors of the schemas above. Hot nodes request JSON output and decode
+# it with these structs in a single C pass; the Pydantic models remain the
+# fallback for LangChain's tool-calling structured output.
+class SearchQueryListStruct(msgspec.Struct):
+    query: List[str]
+    rationale: str = ""
+
+
+class ReflectionStruct(msgspec.Struct):
+    is_sufficient: bool
+    knowledge_gap: str = ""
+    follow_up_queries: List[str] = []
+
+
+class IntentClassificationStruct(msgspec.Struct):
+    intent_type: Literal["research", "youtube", "mixed"]
+    confidence: float
+    youtube_query: Optional[str] = None
+    research_topic: Optional[str] = None
@@ -1,4 +1,6 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+import ahocorasick
 from langchain_core.messages import AnyMessage, AIMessage, HumanMessage
 
 
@@ -19,6 +21,16 @@ def get_research_topic(messages: List[AnyMessage]) -> str:
     return research_topic
 
 
+def get_latest_user_message(messages: List[AnyMessage]) -> str:
+    """
+    Get the content of the most recent user message, ignoring the rest of the history.
+    """
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return message.content
+    return ""
+
+
 def resolve_urls(urls_to_resolve: List[Any], id: int) -> Dict[str, str]:
     """
     Create a map of the vertex ai search urls (very long) to a short url with a unique id for each url.
@@ -36,6 +48,97 @@ def resolve_urls(urls_to_resolve: List[Any], id: int) -> Dict[str, str]:
     return resolved_map
 
 
+def build_short_url_automaton(
+    sources: Iterable[Dict[str, Any]],
+) -> ahocorasick.Automaton:
+    """
+    Build an Aho-Corasick automaton over the short urls of the gathered sources.
+
+    Each short url maps to a `(short_url, original_url)` tuple so all occurrences
+    can be found and replaced in a single pass over the text.
+    """
+    automaton = ahocorasick.Automaton()
+    for source in sources:
+        short_url = source["short_url"]
+        if short_url:
+            automaton.add_word(short_url, (short_url, source["value"]))
+    automaton.make_automaton()
+    return automaton
+
+
+def replace_short_urls(
+    text: str, automaton: ahocorasick.Automaton
+) -> Tuple[str, Set[str]]:
+    """
+    Replace the short urls in a text with their original urls in one linear pass.
+
+    Returns:
+        The rewritten text and the set of short urls that occurred in it.
+    """
+    if len(automaton) == 0:
+        return text, set()
+
+    parts = []
+    used_short_urls = set()
+    last_end = 0
+    for end_index, (short_url, value) in automaton.iter_long(text):
+        start_index = end_index - len(short_url) + 1
+        parts.append(text[last_end:start_index])
+        parts.append(value)
+        used_short_urls.add(short_url)
+        last_end = end_index + 1
+    parts.append(text[last_end:])
+    return "".join(parts), used_short_urls
+
+
+def partial_short_url_len(text: str, automaton: ahocorasick.Automaton) -> int:
+    """
+    Get the length of the longest suffix of a text that could still grow into a short url.
+
+    Streaming callers hold back this many characters so a short url split across
+    two chunks is only rewritten once it is complete.
+    """
+    max_len = automaton.get_stats()["longest_word"]
+    for length in range(min(len(text), max_len), 0, -1):
+        if automaton.match(text[-length:]):
+            return length
+    return 0
+
+
+class ShortUrlStreamRewriter:
+    """
+    Replace short urls in streamed text as soon as they are complete.
+
+    Text that could still be the start of a short url is held back until the
+    next chunk arrives (or `flush` is called), so a short url split across
+    chunks is rewritten whole. The short urls seen so far are collected in
+    `used_short_urls`.
+    """
+
+    def __init__(self, automaton: ahocorasick.Automaton):
+        self.automaton = automaton
+        self.used_short_urls: Set[str] = set()
+        self._pending = ""
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk and return the rewritten text that is ready to emit (may be empty)."""
+        self._pending += chunk
+        ready = len(self._pending) - partial_short_url_len(self._pending, self.automaton)
+        if ready <= 0:
+            return ""
+        return self._rewrite(ready)
+
+    def flush(self) -> str:
+        """Return the rewritten remainder once the stream has ended."""
+        return self._rewrite(len(self._pending))
+
+    def _rewrite(self, length: int) -> str:
+        text, used = replace_short_urls(self._pending[:length], self.automaton)
+        self._pending = self._pending[length:]
+        self.used_short_urls |= used
+        return text
+
+
 def insert_citation_markers(text, citations_list):
     """
     Inserts citation markers into a text string based on start and end indices.
@@ -75,6 +178,20 @@ def insert_citation_markers(text, citations_list):
     return modified_text
 
 
+def truncate_research_text(text: str, max_chars: int) -> str:
+    """
+    Truncate a web research summary without leaving half a citation marker behind.
+    """
+    if len(text) <= max_chars:
+        return text
+    truncated = text[:max_chars]
+    # Drop a trailing " [label](short_url)" marker that was cut in the middle
+    marker_start = truncated.rfind(" [")
+    if marker_start > truncated.rfind(")"):
+        truncated = truncated[:marker_start]
+    return truncated
+
+
 def get_citations(response, resolved_urls_map):
     """
     Extracts and formats citation information from a Gemini model's response.
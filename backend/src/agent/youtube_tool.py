@@ -1,9 +1,176 @@
 # backend/src/agent/youtube_tool.py
+import asyncio
+import functools
+import logging
 import os
-import requests
-from typing import List, Dict, Any
+import re
+import threading
+import textwrap
+import time
+import weakref
+import httpx
+import msgspec
+from cachetools import TTLCache
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
 from pydantic import BaseModel, Field
 
+# ISO 8601 duration designators as byte values
+_HOURS, _MINUTES, _SECONDS = b"HMS"
+# Compiled once; only used for durations the byte scanner does not understand
+_DURATION_RE = re.compile(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?")
+# Repeated searches are served from memory to save latency and API quota
+_SEARCH_CACHE_TTL = 3600
+_HTTP_TIMEOUT = 10.0
+# Rate-limit and transient server errors are retried with exponential backoff
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_MAX_RETRIES = 3
+_RETRY_BACKOFF = 0.2
+
+logger = logging.getLogger(__name__)
+# YouTube Data API partial-response masks for the fields we actually read
+_SEARCH_FIELDS = (
+    "items(id/videoId,snippet(title,channelTitle,description,"
+    "thumbnails/medium/url,publishedAt)),pageInfo/totalResults"
+)
+_DETAILS_FIELDS = "items(id,contentDetails/duration,statistics/viewCount)"
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_duration(duration_str: str) -> str:
+    """Convert ISO 8601 duration to readable format (e.g., PT4M13S -> 4:13)"""
+    # Single pass over the ASCII bytes: accumulate digits and assign the
+    # value when its H/M/S designator is reached
+    data = duration_str.encode("ascii", "replace")
+    if not data.startswith(b"PT"):
+        return "Unknown"
+
+    hours = minutes = seconds = value = 0
+    for byte in data[2:]:
+        if 48 <= byte <= 57:
+            value = value * 10 + byte - 48
+        elif byte == _HOURS:
+            hours, value = value, 0
+        elif byte == _MINUTES:
+            minutes, value = value, 0
+        elif byte == _SECONDS:
+            seconds, value = value, 0
+        else:
+            return _format_duration_fallback(duration_str)
+
+    if hours > 0:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    else:
+        return f"{minutes}:{seconds:02d}"
+
+
+def _format_duration_fallback(duration_str: str) -> str:
+    """Format an unusual duration with the lenient regex parser (e.g., PT1.5S -> 0:00)"""
+    match = _DURATION_RE.match(duration_str)
+
+    if not match:
+        return "Unknown"
+
+    hours, minutes, seconds = (int(group) if group else 0 for group in match.groups())
+
+    if hours > 0:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    else:
+        return f"{minutes}:{seconds:02d}"
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_view_count(count: int) -> str:
+    """Format view count in a readable way (e.g., 1234567 -> 1.2M views)"""
+    if count < 1000:
+        return f"{count} views"
+    elif count < 1000000:
+        unit, suffix = 100, "K"
+    elif count < 1000000000:
+        unit, suffix = 100000, "M"
+    else:
+        unit, suffix = 100000000, "B"
+    # Integer tenths of the unit, rounded half up, instead of float formatting
+    tenths = (count + unit // 2) // unit
+    return f"{tenths // 10}.{tenths % 10}{suffix} views"
+
+
+try:
+    # Compiled formatters, present when the optional Cython extension was built
+    from agent._youtube_speedups import (
+        format_duration as _format_duration_native,
+        format_view_count as _format_view_count,
+    )
+except ImportError:
+    pass
+else:
+    @functools.lru_cache(maxsize=4096)
+    def _format_duration(duration_str: str) -> str:
+        """Convert ISO 8601 duration to readable format (e.g., PT4M13S -> 4:13)"""
+        formatted = _format_duration_native(duration_str)
+        if formatted is None:
+            return _format_duration_fallback(duration_str)
+        return formatted
+
+
+# Typed views of the API responses; msgspec decodes only these fields and
+# skips everything else in the payload
+class _Thumbnail(msgspec.Struct):
+    url: str
+
+
+class _Thumbnails(msgspec.Struct):
+    medium: _Thumbnail
+
+
+class _Snippet(msgspec.Struct):
+    title: str
+    channelTitle: str
+    description: str
+    thumbnails: _Thumbnails
+    publishedAt: str
+
+
+class _ResourceId(msgspec.Struct):
+    videoId: str
+
+
+class _SearchItem(msgspec.Struct):
+    id: _ResourceId
+    snippet: _Snippet
+
+
+class _PageInfo(msgspec.Struct):
+    totalResults: Optional[int] = None
+
+
+class _SearchResponse(msgspec.Struct):
+    items: List[_SearchItem] = []
+    pageInfo: _PageInfo = msgspec.field(default_factory=_PageInfo)
+
+
+class _ContentDetails(msgspec.Struct):
+    duration: str = "PT0S"
+
+
+class _Statistics(msgspec.Struct):
+    # The API returns counts as strings and omits hidden ones
+    viewCount: Optional[str] = None
+
+
+class _VideoDetails(msgspec.Struct):
+    id: str
+    contentDetails: Optional[_ContentDetails] = None
+    statistics: Optional[_Statistics] = None
+
+
+class _DetailsResponse(msgspec.Struct):
+    items: List[_VideoDetails] = []
+
+
+# Reused across calls so decoder state is built once
+_SEARCH_DECODER = msgspec.json.Decoder(_SearchResponse)
+_DETAILS_DECODER = msgspec.json.Decoder(_DetailsResponse)
+
 
 class YouTubeVideoResult(BaseModel):
     video_id: str = Field(description="YouTube video ID")
@@ -22,6 +189,84 @@ class YouTubeSearchResults(BaseModel):
     total_results: int = Field(description="Total number of results found")
 
 
+def _empty_results(query: str) -> YouTubeSearchResults:
+    return YouTubeSearchResults.model_construct(videos=[], query=query, total_results=0)
+
+
+# Pages up to this size (the agent asks for 5) get a loop-unrolled builder;
+# larger ones use the generated loop
+_MAX_UNROLLED_RESULTS = 10
+
+# Builds one YouTubeVideoResult from search item `item{i}`. The single source
+# for both builders: {i} is "" inside the loop and "_<index>" when unrolled
+_VIDEO_BUILDER_SRC = """
+snippet{i} = item{i}.snippet
+video_id{i} = item{i}.id.videoId
+description{i} = snippet{i}.description
+if len(description{i}) > 200:
+    description{i} = f"{description{i}[:200]}..."
+details{i} = details_by_id.get(video_id{i})
+duration{i} = view_count{i} = "Unknown"
+if details{i} is not None:
+    if details{i}.contentDetails is not None:
+        duration{i} = format_duration(details{i}.contentDetails.duration)
+    if details{i}.statistics is not None:
+        try:
+            views{i} = int(details{i}.statistics.viewCount or 0)
+        except ValueError:
+            pass
+        else:
+            view_count{i} = format_view_count(views{i})
+# The API response is trusted; skip per-field validation
+video{i} = construct(
+    video_id=video_id{i},
+    title=snippet{i}.title,
+    channel=snippet{i}.channelTitle,
+    description=description{i},
+    thumbnail_url=snippet{i}.thumbnails.medium.url,
+    duration=duration{i},
+    view_count=view_count{i},
+    published_at=snippet{i}.publishedAt[:10],  # Just the date
+)
+"""
+
+
+def _video_builder_src(suffix: str, indent: str) -> str:
+    return textwrap.indent(_VIDEO_BUILDER_SRC.replace("{i}", suffix), indent)
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_builder(count: Optional[int]) -> Callable[..., List[YouTubeVideoResult]]:
+    """Generate a builder for exactly `count` items (unrolled), or any number when None."""
+    if count is None:
+        source = (
+            "def build(items, details_by_id):\n"
+            "    videos = []\n"
+            "    for item in items:\n"
+            f"{_video_builder_src('', ' ' * 8)}"
+            "        videos.append(video)\n"
+            "    return videos\n"
+        )
+    else:
+        body = "".join(
+            f"    item_{i} = items[{i}]\n{_video_builder_src(f'_{i}', ' ' * 4)}"
+            for i in range(count)
+        )
+        videos = ", ".join(f"video_{i}" for i in range(count))
+        source = f"def build(items, details_by_id):\n{body}    return [{videos}]\n"
+    namespace = {
+        'construct': YouTubeVideoResult.model_construct,
+        'format_duration': _format_duration,
+        'format_view_count': _format_view_count,
+    }
+    exec(compile(source, f"<youtube builder {count}>", "exec"), namespace)
+    return namespace['build']
+
+
+def _get_builder(count: int) -> Callable[..., List[YouTubeVideoResult]]:
+    return _compile_builder(count if count <= _MAX_UNROLLED_RESULTS else None)
+
+
 class YouTubeTool:
     def __init__(self, api_key: str = None):
         self.api_key = api_key or os.getenv("YOUTUBE_API_KEY")
@@ -29,141 +274,239 @@ class YouTubeTool:
             raise ValueError("YouTube API key is required")
         
         self.base_url = "https://www.googleapis.com/youtube/v3"
+        # googleapis.com speaks HTTP/2, so the search and details calls (and
+        # later searches) multiplex over one pooled TLS connection
+        self._client = httpx.Client(
+            transport=httpx.HTTPTransport(http2=True, retries=_MAX_RETRIES),
+            params={'key': self.api_key},
+            timeout=_HTTP_TIMEOUT,
+        )
+        self._search_cache: TTLCache = TTLCache(maxsize=512, ttl=_SEARCH_CACHE_TTL)
+        # Per-video details; popular videos recur across searches and only
+        # the ids missing here are sent to the /videos endpoint
+        self._details_cache: TTLCache = TTLCache(maxsize=4096, ttl=_SEARCH_CACHE_TTL)
+        self._cache_lock = threading.Lock()
+        # An AsyncClient's connections belong to the event loop that opened
+        # them, and the shared tool may be used from several loops (e.g.
+        # repeated asyncio.run calls), so the client is rebuilt per loop
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_client_loop: Optional[weakref.ref] = None
     
-    def search_videos(self, query: str, max_results: int = 5) -> YouTubeSearchResults:
+    def search_videos(
+        self, query: str, max_results: int = 5, include_details: bool = True
+    ) -> YouTubeSearchResults:
         """
         Search for YouTube videos based on a query string.
         
         Args:
             query: Search query string
             max_results: Maximum number of results to return (default: 5)
+            include_details: Also fetch duration and view count, which costs a
+                second API call; otherwise both are "Unknown" (default: True)
             
         Returns:
             YouTubeSearchResults object containing video information
         """
+        steps = self._search_steps(query, max_results, include_details)
         try:
-            # Search for videos
-            search_url = f"{self.base_url}/search"
-            search_params = {
-                'part': 'snippet',
-                'q': query,
-                'type': 'video',
-                'maxResults': max_results,
-                'key': self.api_key,
-                'order': 'relevance'
-            }
-            
-            response = requests.get(search_url, params=search_params)
-            response.raise_for_status()
-            search_data = response.json()
-            
-            if not search_data.get('items'):
-                return YouTubeSearchResults(
-                    videos=[],
-                    query=query,
-                    total_results=0
-                )
-            
-            # Get video IDs for detailed information
-            video_ids = [item['id']['videoId'] for item in search_data['items']]
-            
-            # Get video details (duration, view count, etc.)
-            details_url = f"{self.base_url}/videos"
-            details_params = {
-                'part': 'statistics,contentDetails',
-                'id': ','.join(video_ids),
-                'key': self.api_key
-            }
-            
-            details_response = requests.get(details_url, params=details_params)
-            details_response.raise_for_status()
-            details_data = details_response.json()
-            
-            # Create video results
-            videos = []
-            for i, item in enumerate(search_data['items']):
-                # Find corresponding details
-                video_details = None
-                for detail in details_data.get('items', []):
-                    if detail['id'] == item['id']['videoId']:
-                        video_details = detail
-                        break
-                
-                # Format duration
-                duration = "Unknown"
-                if video_details and 'contentDetails' in video_details:
-                    duration = self._format_duration(
-                        video_details['contentDetails'].get('duration', 'PT0S')
-                    )
-                
-                # Format view count
-                view_count = "Unknown"
-                if video_details and 'statistics' in video_details:
-                    views = video_details['statistics'].get('viewCount', '0')
-                    view_count = self._format_view_count(int(views))
-                
-                video = YouTubeVideoResult(
-                    video_id=item['id']['videoId'],
-                    title=item['snippet']['title'],
-                    channel=item['snippet']['channelTitle'],
-                    description=item['snippet']['description'][:200] + "...",
-                    thumbnail_url=item['snippet']['thumbnails']['medium']['url'],
-                    duration=duration,
-                    view_count=view_count,
-                    published_at=item['snippet']['publishedAt'][:10]  # Just the date
-                )
-                videos.append(video)
-            
-            return YouTubeSearchResults(
-                videos=videos,
-                query=query,
-                total_results=search_data.get('pageInfo', {}).get('totalResults', len(videos))
-            )
-            
-        except requests.RequestException as e:
-            print(f"YouTube API error: {e}")
-            return YouTubeSearchResults(
-                videos=[],
-                query=query,
-                total_results=0
-            )
+            request = next(steps)
+            while True:
+                request = steps.send(self._get(*request))
+        except StopIteration as done:
+            return done.value
+        except (httpx.HTTPError, msgspec.DecodeError) as e:
+            return self._search_failed(query, e)
     
-    def _format_duration(self, duration_str: str) -> str:
-        """Convert ISO 8601 duration to readable format (e.g., PT4M13S -> 4:13)"""
-        import re
+    async def search_videos_async(
+        self, query: str, max_results: int = 5, include_details: bool = True
+    ) -> YouTubeSearchResults:
+        """
+        Search for YouTube videos without blocking the event loop.
         
-        pattern = r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?'
-        match = re.match(pattern, duration_str)
+        Several searches can be awaited concurrently, e.g. with
+        `asyncio.gather`, and share one pooled HTTP/2 client.
+        
+        Args:
+            query: Search query string
+            max_results: Maximum number of results to return (default: 5)
+            include_details: Also fetch duration and view count, which costs a
+                second API call; otherwise both are "Unknown" (default: True)
+            
+        Returns:
+            YouTubeSearchResults object containing video information
+        """
+        steps = self._search_steps(query, max_results, include_details)
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(await self._aget(*request))
+        except StopIteration as done:
+            return done.value
+        except (httpx.HTTPError, msgspec.DecodeError) as e:
+            return self._search_failed(query, e)
+    
+    def _search_steps(
+        self, query: str, max_results: int, include_details: bool
+    ) -> Generator[Tuple[str, Dict[str, Any]], httpx.Response, YouTubeSearchResults]:
+        """
+        Run a search independently of how its API requests are sent.
         
-        if not match:
-            return "Unknown"
+        Yields the (url, params) of each request and expects the response to be
+        sent back; returns the results. search_videos and search_videos_async
+        drive it, so they differ only in their I/O.
+        """
+        cache_key = (query.lower().strip(), max_results, include_details)
+        cached = self._get_cached(cache_key, query)
+        if cached is not None:
+            return cached
         
-        hours, minutes, seconds = match.groups()
-        hours = int(hours) if hours else 0
-        minutes = int(minutes) if minutes else 0
-        seconds = int(seconds) if seconds else 0
+        # Search for videos
+        response = yield f"{self.base_url}/search", self._search_params(query, max_results)
+        search_data = _SEARCH_DECODER.decode(response.content)
         
-        if hours > 0:
-            return f"{hours}:{minutes:02d}:{seconds:02d}"
-        else:
-            return f"{minutes}:{seconds:02d}"
-    
-    def _format_view_count(self, count: int) -> str:
-        """Format view count in a readable way (e.g., 1234567 -> 1.2M views)"""
-        if count < 1000:
-            return f"{count} views"
-        elif count < 1000000:
-            return f"{count/1000:.1f}K views"
-        elif count < 1000000000:
-            return f"{count/1000000:.1f}M views"
+        if not search_data.items:
+            results = _empty_results(query)
+        elif not include_details:
+            results = self._build_results(query, search_data, {})
         else:
-            return f"{count/1000000000:.1f}B views"
+            # Get video details (duration, view count, etc.)
+            details_by_id, missing_ids = self._get_cached_details(search_data)
+            if missing_ids:
+                details_response = yield (
+                    f"{self.base_url}/videos", self._details_params(missing_ids)
+                )
+                details_data = _DETAILS_DECODER.decode(details_response.content)
+                self._set_cached_details(details_data, details_by_id)
+            results = self._build_results(query, search_data, details_by_id)
+        
+        self._set_cached(cache_key, results)
+        return results
+    
+    def _search_failed(self, query: str, error: Exception) -> YouTubeSearchResults:
+        logger.warning("YouTube API error: %s", error)
+        return _empty_results(query)
+    
+    def _get_cached(self, cache_key: tuple, query: str) -> Optional[YouTubeSearchResults]:
+        with self._cache_lock:
+            cached = self._search_cache.get(cache_key)
+        if cached is not None and cached.query != query:
+            # Same normalized query; report it as the caller phrased it
+            cached = cached.model_copy(update={'query': query})
+        return cached
+    
+    def _set_cached(self, cache_key: tuple, results: YouTubeSearchResults) -> None:
+        with self._cache_lock:
+            self._search_cache[cache_key] = results
+    
+    def _get_cached_details(
+        self, search_data: _SearchResponse
+    ) -> Tuple[Dict[str, _VideoDetails], List[str]]:
+        """Split the searched video ids into cached details and ids still to fetch."""
+        details_by_id = {}
+        missing_ids = []
+        with self._cache_lock:
+            for item in search_data.items:
+                video_id = item.id.videoId
+                details = self._details_cache.get(video_id)
+                if details is None:
+                    missing_ids.append(video_id)
+                else:
+                    details_by_id[video_id] = details
+        return details_by_id, missing_ids
+    
+    def _set_cached_details(
+        self, details_data: _DetailsResponse, details_by_id: Dict[str, _VideoDetails]
+    ) -> None:
+        with self._cache_lock:
+            for detail in details_data.items:
+                self._details_cache[detail.id] = detail
+                details_by_id[detail.id] = detail
+    
+    def _get(self, url: str, params: Dict[str, Any]) -> httpx.Response:
+        # Connection failures are retried by the transport; retry
+        # rate-limit/server-error responses here
+        for attempt in range(_MAX_RETRIES + 1):
+            response = self._client.get(url, params=params)
+            if response.status_code not in _RETRY_STATUSES or attempt == _MAX_RETRIES:
+                break
+            time.sleep(_RETRY_BACKOFF * 2 ** attempt)
+        return response.raise_for_status()
+    
+    async def _aget(self, url: str, params: Dict[str, Any]) -> httpx.Response:
+        client = self._get_async_client()
+        for attempt in range(_MAX_RETRIES + 1):
+            response = await client.get(url, params=params)
+            if response.status_code not in _RETRY_STATUSES or attempt == _MAX_RETRIES:
+                break
+            await asyncio.sleep(_RETRY_BACKOFF * 2 ** attempt)
+        return response.raise_for_status()
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if not self._owns_async_client(loop):
+            # A client left over from another (possibly closed) loop cannot
+            # be closed from here; dropping it releases its pool
+            self._async_client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(http2=True, retries=_MAX_RETRIES),
+                params={'key': self.api_key},
+                timeout=_HTTP_TIMEOUT,
+            )
+            self._async_client_loop = weakref.ref(loop)
+        return self._async_client
+    
+    def _owns_async_client(self, loop: asyncio.AbstractEventLoop) -> bool:
+        return (
+            self._async_client is not None
+            and not self._async_client.is_closed
+            and self._async_client_loop is not None
+            and self._async_client_loop() is loop
+        )
+    
+    def _search_params(self, query: str, max_results: int) -> Dict[str, Any]:
+        return {
+            'part': 'snippet',
+            'q': query,
+            'type': 'video',
+            'maxResults': max_results,
+            'order': 'relevance',
+            # Partial response: only the fields _build_results reads
+            'fields': _SEARCH_FIELDS,
+        }
+    
+    def _details_params(self, video_ids: List[str]) -> Dict[str, Any]:
+        return {
+            'part': 'statistics,contentDetails',
+            'id': ','.join(video_ids),
+            'fields': _DETAILS_FIELDS,
+        }
+    
+    def _build_results(
+        self,
+        query: str,
+        search_data: _SearchResponse,
+        details_by_id: Dict[str, _VideoDetails],
+    ) -> YouTubeSearchResults:
+        """Combine the search response with the video details, keyed by video id."""
+        items = search_data.items
+        total_results = search_data.pageInfo.totalResults
+        videos = _get_builder(len(items))(items, details_by_id)
+        return YouTubeSearchResults.model_construct(
+            videos=videos,
+            query=query,
+            total_results=len(videos) if total_results is None else total_results
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def get_youtube_tool() -> YouTubeTool:
+    """Return the process-wide YouTubeTool so its HTTP clients and caches are shared."""
+    return YouTubeTool()
 
 
 # Example usage and test function
 def test_youtube_integration():
     """Test the YouTube integration"""
-    youtube = YouTubeTool()
+    youtube = get_youtube_tool()
     results = youtube.search_videos("python programming tutorial", max_results=3)
     
     print(f"Found {results.total_results} results for '{results.query}':")
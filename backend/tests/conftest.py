@@ -0,0 +1,5 @@
+import os
+
+# Importing any agent module builds the graph, which requires an API key;
+# unit tests never reach the network
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
@@ -0,0 +1,98 @@
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+import pytest
+from cachetools import TTLCache
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agent.graph import _keyword_intent
+
+# agent/__init__.py re-exports the compiled graph under the module's name
+graph = importlib.import_module("agent.graph")
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "find youtube tutorials on pandas",
+        "show me videos about sourdough",
+        "summarize https://youtu.be/abc123",
+    ],
+)
+def test_keyword_intent_detects_youtube(query):
+    intent = _keyword_intent([HumanMessage(content=query)])
+
+    assert intent["intent_type"] == "youtube"
+    assert intent["youtube_query"] == query
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "explain how transformers work",
+        "How do video codecs like AV1 work?",
+    ],
+)
+def test_keyword_intent_detects_research(query):
+    assert _keyword_intent([HumanMessage(content=query)])["intent_type"] == "research"
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "history of the English Channel",
+        "how to watch the eclipse safely",
+        "best cooking vlog ideas",
+        "Summarize the video game industry in 2024",
+        "explain this youtube video about black holes",
+    ],
+)
+def test_keyword_intent_defers_ambiguous_queries_to_the_llm(query):
+    assert _keyword_intent([HumanMessage(content=query)]) is None
+
+
+def _youtube_thread(follow_up):
+    return [
+        HumanMessage(content="show me youtube videos about sourdough"),
+        AIMessage(content="I found 5 videos for 'sourdough':\n\n1. **Sourdough** by Baker\n"),
+        HumanMessage(content=follow_up),
+    ]
+
+
+def test_keyword_intent_ignores_earlier_turns():
+    messages = _youtube_thread("Tell me about the history of bread in Egypt")
+
+    assert _keyword_intent(messages) is None
+
+
+def test_keyword_intent_leaves_follow_up_video_queries_to_the_llm():
+    # The search terms have to be resolved against the history, so the raw
+    # message (or transcript) is never used as the youtube_query
+    messages = _youtube_thread("show me videos of that on youtube")
+
+    assert _keyword_intent(messages) is None
+
+
+def test_web_research_does_not_cache_failed_responses(monkeypatch):
+    calls = []
+
+    async def generate_content(**kwargs):
+        calls.append(kwargs)
+        # A blocked response carries no candidates and no text
+        return SimpleNamespace(candidates=[], text=None)
+
+    monkeypatch.setattr(
+        graph,
+        "genai_client",
+        SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content))),
+    )
+    monkeypatch.setattr(graph, "_web_research_cache", TTLCache(maxsize=4, ttl=60))
+    state = {"search_query": "blocked query", "id": 0}
+
+    for _ in range(2):
+        result = asyncio.run(graph.web_research(state, {}))
+        assert result["web_research_result"][0].startswith(graph.WEB_RESEARCH_ERROR_PREFIX)
+
+    assert len(calls) == 2
+    assert len(graph._web_research_cache) == 0
@@ -0,0 +1,88 @@
+import pytest
+
+from agent.utils import (
+    ShortUrlStreamRewriter,
+    build_short_url_automaton,
+    partial_short_url_len,
+    replace_short_urls,
+    truncate_research_text,
+)
+
+SHORT_1_1 = "https://vertexaisearch.cloud.google.com/id/1-1"
+SHORT_1_10 = "https://vertexaisearch.cloud.google.com/id/1-10"
+
+
+@pytest.fixture
+def automaton():
+    return build_short_url_automaton(
+        [
+            {"short_url": SHORT_1_1, "value": "https://one.example"},
+            {"short_url": SHORT_1_10, "value": "https://ten.example"},
+        ]
+    )
+
+
+def _stream(chunks, automaton):
+    rewriter = ShortUrlStreamRewriter(automaton)
+    streamed = "".join(rewriter.feed(chunk) for chunk in chunks) + rewriter.flush()
+    return streamed, rewriter.used_short_urls
+
+
+def test_replace_short_urls_prefers_longest_match(automaton):
+    text = f"A [x]({SHORT_1_10}) and B [y]({SHORT_1_1})."
+
+    replaced, used = replace_short_urls(text, automaton)
+
+    assert replaced == "A [x](https://ten.example) and B [y](https://one.example)."
+    assert used == {SHORT_1_1, SHORT_1_10}
+
+
+def test_replace_short_urls_without_sources():
+    automaton = build_short_url_automaton([])
+
+    assert replace_short_urls("no links here", automaton) == ("no links here", set())
+
+
+def test_partial_short_url_len_holds_back_possible_prefixes(automaton):
+    assert partial_short_url_len("see [x](https://vertexaisearch.clo", automaton) == len(
+        "https://vertexaisearch.clo"
+    )
+    # A complete short url may still grow into a longer one
+    assert partial_short_url_len(f"see [x]({SHORT_1_1}", automaton) == len(SHORT_1_1)
+    assert partial_short_url_len(f"see [x]({SHORT_1_1})", automaton) == 0
+
+
+@pytest.mark.parametrize("split", [10, 30, len("Answer [x](") + 20, len("Answer [x](") + len(SHORT_1_1)])
+def test_short_url_split_across_chunks(automaton, split):
+    answer = f"Answer [x]({SHORT_1_10}) and [y]({SHORT_1_1})."
+
+    streamed, used = _stream([answer[:split], answer[split:]], automaton)
+
+    assert streamed == "Answer [x](https://ten.example) and [y](https://one.example)."
+    assert used == {SHORT_1_1, SHORT_1_10}
+
+
+def test_short_url_streamed_one_character_at_a_time(automaton):
+    answer = f"[x]({SHORT_1_1}) [y]({SHORT_1_10})"
+
+    streamed, _ = _stream(list(answer), automaton)
+
+    assert streamed == "[x](https://one.example) [y](https://ten.example)"
+
+
+def test_truncate_research_text_keeps_short_text():
+    assert truncate_research_text("short", 10) == "short"
+
+
+def test_truncate_research_text_drops_cut_citation_marker():
+    text = f"Fact one [a]({SHORT_1_1}). Fact two [b]({SHORT_1_10})."
+    cut = text.index(SHORT_1_10) + 10
+
+    assert truncate_research_text(text, cut) == f"Fact one [a]({SHORT_1_1}). Fact two"
+
+
+def test_truncate_research_text_keeps_complete_citation_marker():
+    text = f"Fact one [a]({SHORT_1_1}). Fact two is longer."
+    cut = text.index(")") + 1
+
+    assert truncate_research_text(text, cut) == f"Fact one [a]({SHORT_1_1})"
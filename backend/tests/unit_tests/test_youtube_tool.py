@@ -0,0 +1,229 @@
+import asyncio
+import re
+
+import httpx
+import msgspec
+import pytest
+
+from agent import youtube_tool
+from agent.youtube_tool import YouTubeTool
+
+
+def _search_items(count):
+    return [
+        {
+            "id": {"kind": "youtube#video", "videoId": f"v{i}"},
+            "snippet": {
+                "title": f"Title {i}",
+                "channelTitle": "Channel",
+                "description": "d" * (150 + 20 * i),
+                "thumbnails": {"medium": {"url": f"https://img/{i}"}},
+                "publishedAt": "2024-01-02T03:04:05Z",
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def _search_response(count):
+    return youtube_tool._SEARCH_DECODER.decode(
+        msgspec.json.encode({"items": _search_items(count), "pageInfo": {"totalResults": 1234}})
+    )
+
+
+DETAILS = {
+    "items": [
+        {"id": "v0", "contentDetails": {"duration": "PT4M13S"}, "statistics": {"viewCount": "1234567"}},
+        {"id": "v1", "contentDetails": {"duration": "PT1H2M3S"}},
+        {"id": "v2", "statistics": {"viewCount": "not a number"}},
+        {"id": "v4", "statistics": {}},
+    ]
+}
+
+
+def _details_by_id():
+    decoded = youtube_tool._DETAILS_DECODER.decode(msgspec.json.encode(DETAILS))
+    return {detail.id: detail for detail in decoded.items}
+
+
+DURATIONS = [
+    "PT4M13S",
+    "PT1H2M3S",
+    "PT45S",
+    "PT1.5S",
+    "P0D",
+    "PT",
+    "",
+    "PT1H\u00c4",
+    "PT\u0663M",  # ARABIC-INDIC DIGIT THREE
+    "PT99999999999999999999999S",
+]
+
+
+def _baseline_format_duration(duration_str):
+    """The original regex-only implementation the scanner must agree with."""
+    match = re.match(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?", duration_str)
+    if not match:
+        return "Unknown"
+    hours, minutes, seconds = (int(group) if group else 0 for group in match.groups())
+    if hours > 0:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+@pytest.mark.parametrize(
+    "duration_str, expected",
+    [
+        ("PT1H2M3S", "1:02:03"),
+        ("PT1.5S", "0:00"),
+        ("P0D", "Unknown"),
+        ("PT", "0:00"),
+        ("PT1H\u00c4", "1:00:00"),
+    ],
+)
+def test_format_duration(duration_str, expected):
+    assert youtube_tool._format_duration(duration_str) == expected
+
+
+@pytest.mark.parametrize("duration_str", DURATIONS)
+def test_format_duration_matches_regex_baseline(duration_str):
+    expected = _baseline_format_duration(duration_str)
+
+    assert youtube_tool._format_duration(duration_str) == expected
+    assert youtube_tool._format_duration_fallback(duration_str) == expected
+
+
+@pytest.mark.parametrize("duration_str", DURATIONS)
+def test_compiled_format_duration_matches_regex_baseline(duration_str):
+    speedups = pytest.importorskip("agent._youtube_speedups")
+
+    formatted = speedups.format_duration(duration_str)
+    if formatted is None:
+        formatted = youtube_tool._format_duration_fallback(duration_str)
+    assert formatted == _baseline_format_duration(duration_str)
+
+
+@pytest.fixture
+def tool():
+    return YouTubeTool(api_key="test-key")
+
+
+@pytest.mark.parametrize("count", [0, 1, 5, 7])
+def test_unrolled_builder_matches_loop(count):
+    search_data = _search_response(count)
+    details_by_id = _details_by_id()
+
+    unrolled = youtube_tool._compile_builder(count)(search_data.items, details_by_id)
+    looped = youtube_tool._compile_builder(None)(search_data.items, details_by_id)
+
+    assert unrolled == looped
+    assert len(unrolled) == count
+
+
+def test_build_results_formats_videos(tool):
+    results = tool._build_results("query", _search_response(5), _details_by_id())
+
+    assert results.query == "query"
+    assert results.total_results == 1234
+    assert [(video.duration, video.view_count) for video in results.videos] == [
+        ("4:13", "1.2M views"),
+        ("1:02:03", "Unknown"),
+        ("Unknown", "Unknown"),
+        ("Unknown", "Unknown"),
+        ("Unknown", "0 views"),
+    ]
+    assert results.videos[0].description == "d" * 150
+    assert results.videos[3].description == "d" * 200 + "..."
+    assert results.videos[0].published_at == "2024-01-02"
+
+
+def test_build_results_uses_loop_for_large_pages(tool):
+    count = youtube_tool._MAX_UNROLLED_RESULTS + 1
+    results = tool._build_results("query", _search_response(count), _details_by_id())
+
+    assert youtube_tool._get_builder(count) is youtube_tool._compile_builder(None)
+    assert [video.video_id for video in results.videos] == [f"v{i}" for i in range(count)]
+
+
+class _FakeAPI:
+    """Answers the search and details requests and records which were sent."""
+
+    def __init__(self, count=5, error=None):
+        self.count = count
+        self.error = error
+        self.requests = []
+
+    def get(self, url, params):
+        self.requests.append((url.rsplit("/", 1)[-1], params))
+        if self.error is not None:
+            raise self.error
+        if url.endswith("/search"):
+            body = {"items": _search_items(self.count), "pageInfo": {"totalResults": 1234}}
+        else:
+            ids = params["id"].split(",")
+            body = {"items": [item for item in DETAILS["items"] if item["id"] in ids]}
+        return httpx.Response(200, content=msgspec.json.encode(body))
+
+    async def aget(self, url, params):
+        return self.get(url, params)
+
+
+@pytest.fixture(params=["sync", "async"])
+def search(request, tool, monkeypatch):
+    """search_videos or search_videos_async (run to completion) on a fake API."""
+    api = _FakeAPI()
+    monkeypatch.setattr(tool, "_get", api.get)
+    monkeypatch.setattr(tool, "_aget", api.aget)
+
+    def run(*args, **kwargs):
+        if request.param == "sync":
+            return tool.search_videos(*args, **kwargs)
+        return asyncio.run(tool.search_videos_async(*args, **kwargs))
+
+    run.api = api
+    return run
+
+
+def test_search_videos_fetches_search_and_details(search):
+    results = search("Sourdough")
+
+    assert [video.video_id for video in results.videos] == [f"v{i}" for i in range(5)]
+    assert results.videos[0].duration == "4:13"
+    assert [endpoint for endpoint, _ in search.api.requests] == ["search", "videos"]
+
+
+def test_search_videos_serves_repeated_queries_from_cache(search):
+    first = search("Sourdough")
+    second = search(" sourdough ")
+
+    assert second.query == " sourdough "
+    assert second.videos == first.videos
+    assert len(search.api.requests) == 2
+
+
+def test_search_videos_only_fetches_uncached_details(search):
+    search("sourdough", max_results=5)
+    search.api.count = 7
+    search("sourdough", max_results=7)
+
+    # v3 came back without details, so it is asked for again
+    assert search.api.requests[-1][1]["id"] == "v3,v5,v6"
+
+
+def test_search_videos_skips_details_when_not_requested(search):
+    results = search("sourdough", include_details=False)
+
+    assert {video.duration for video in results.videos} == {"Unknown"}
+    assert [endpoint for endpoint, _ in search.api.requests] == ["search"]
+
+
+def test_search_videos_returns_empty_results_on_api_errors(search):
+    search.api.error = httpx.ConnectError("offline")
+
+    results = search("sourdough")
+
+    assert results.videos == []
+    assert results.query == "sourdough"
+    # Failures are not cached
+    search.api.error = None
+    assert len(search("sourdough").videos) == 5
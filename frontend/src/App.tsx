@@ -1,7 +1,7 @@
 // frontend/src/App.tsx (Fixed version)
 import { useStream } from "@langchain/langgraph-sdk/react";
 import type { Message } from "@langchain/langgraph-sdk";
-import { useState, useEffect, useRef, useCallback } from "react";
+import { useState, useEffect, useRef, useCallback, useMemo } from "react";
 import { ProcessedEvent } from "@/components/ActivityTimeline";
 import { WelcomeScreen } from "@/components/WelcomeScreen";
 import { ChatMessagesView } from "@/components/ChatMessagesView";
@@ -16,6 +16,8 @@ export default function App() {
   // Fixed: Use a more stable state structure for YouTube results
   const [youtubeResults, setYoutubeResults] = useState<any>(null);
   const [currentThreadId, setCurrentThreadId] = useState<string>("");
+  // Final answer text streamed by finalize_answer before its message lands
+  const [streamingAnswer, setStreamingAnswer] = useState<string>("");
   const scrollAreaRef = useRef<HTMLDivElement>(null);
   const hasFinalizeEventOccurredRef = useRef(false);
 
@@ -35,16 +37,32 @@ export default function App() {
     onFinish: (event: any) => {
       console.log("Thread finished:", event);
     },
+    // Registering this handler makes useStream request the "custom" stream mode
+    onCustomEvent: (event: any) => {
+      if (typeof event?.answer_chunk === "string") {
+        const chunk = event.answer_chunk;
+        setStreamingAnswer((prev) => prev + chunk);
+      }
+    },
     onUpdateEvent: (event: any) => {
       let processedEvent: ProcessedEvent | null = null;
       
-      // Handle intent classification
-      if (event.classify_intent) {
-        const intent = event.classify_intent.intent_type;
+      // Handle intent classification (queries are generated alongside it)
+      if (event.classify_and_prefetch) {
+        const update = event.classify_and_prefetch;
         processedEvent = {
           title: "Analyzing Intent",
-          data: `Detected: ${intent} (${Math.round(event.classify_intent.confidence * 100)}% confidence)`,
+          data: `Detected: ${update.intent_type} (${Math.round(update.confidence * 100)}% confidence)`,
         };
+        const queries = update.query_list || [];
+        if (queries.length > 0) {
+          const intentEvent = processedEvent;
+          setProcessedEventsTimeline((prevEvents) => [...prevEvents, intentEvent]);
+          processedEvent = {
+            title: "Generating Search Queries",
+            data: queries.join(", "),
+          };
+        }
       }
       
       // Handle YouTube action - Fixed: More stable YouTube result handling
@@ -71,15 +89,9 @@ export default function App() {
       }
       
       // Existing event handlers
-      else if (event.generate_query) {
-        const queries = event.generate_query.query_list || [];
-        const queryString = Array.isArray(queries) ? queries.join(", ") : String(queries);
-        processedEvent = {
-          title: "Generating Search Queries",
-          data: queryString,
-        };
-      } else if (event.web_research) {
-        const sources = event.web_research.sources_gathered || [];
+      else if (event.web_research || event.batch_web_research) {
+        const research = event.web_research || event.batch_web_research;
+        const sources = research.sources_gathered || [];
         const numSources = sources.length;
         const uniqueLabels = [
           ...new Set(sources.map((s: any) => s.label).filter(Boolean)),
@@ -154,6 +166,7 @@ export default function App() {
       setCurrentThreadId(newThreadId);
       
       setProcessedEventsTimeline([]);
+      setStreamingAnswer("");
       // Fixed: Don't reset YouTube results immediately, let them persist until new ones arrive
       if (!thread.isLoading) {
         setYoutubeResults(null);
@@ -204,6 +217,18 @@ export default function App() {
     window.location.reload();
   }, [thread]);
 
+  // Show the partial answer as an AI message until the final one arrives
+  const displayedMessages = useMemo(() => {
+    const lastMessage = thread.messages[thread.messages.length - 1];
+    if (!streamingAnswer || !lastMessage || lastMessage.type !== "human") {
+      return thread.messages;
+    }
+    return [
+      ...thread.messages,
+      { type: "ai", id: "streaming-answer", content: streamingAnswer } as Message,
+    ];
+  }, [thread.messages, streamingAnswer]);
+
   return (
     <div className="flex h-screen bg-neutral-800 text-neutral-100 font-sans antialiased">
       <main className="h-full w-full max-w-4xl mx-auto">
@@ -215,7 +240,7 @@ export default function App() {
             />
           ) : (
             <ChatMessagesView
-              messages={thread.messages}
+              messages={displayedMessages}
               isLoading={thread.isLoading}
               scrollAreaRef={scrollAreaRef}
               onSubmit={handleSubmit}